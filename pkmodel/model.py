@@ -15,7 +15,7 @@ class BaseModel:
         Defaults to all 1s if None is passed.
         Must include
     dose: func, optional
-        The dosing function Dose(t).
+        The dosing function Dose(t), e.g. a :class:`pkmodel.dosing.Dose`.
         Defaults to constant concentration X.
 
     """
@@ -35,10 +35,8 @@ class BaseModel:
             assert set(keys) <= model_args.keys, "Invalid model arrguments"
 
         if dose is None:
-            def dose(t):
-                '''Define a function dose(t) that represents the drug dose as a function of time
-                It's a simple function that returns a constant dose X at any given time t.'''
-                return pkmodel.dosing.constant(model_args['X'])(t)
+            # Constant dose X at any given time t
+            dose = pkmodel.dosing.constant(model_args['X'])
 
         self.model_args = model_args
         self.__dict__.update(model_args)  # Saves all params
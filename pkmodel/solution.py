@@ -37,16 +37,50 @@ class Solution:
         self.y0 = y0
 
         # Calculate total dosing
-        total_dose = scipy.integrate.quad(self.model.dose, 0, T)
-        self.total_dose = np.round(total_dose[0], 3)
+        if isinstance(self.model.dose, pk.dosing.Dose):
+            total_dose = self.model.dose.integrate(0, T)
+        else:
+            total_dose = scipy.integrate.quad(self.model.dose, 0, T)[0]
+        self.total_dose = np.round(total_dose, 3)
 
     def solve(self):
-        '''Solve the pharmacokinetic model using scipy.integrate.solve_ivp'''
-        sol = scipy.integrate.solve_ivp(
-            fun=lambda t, y: self.model.rhs(t, y),
-            t_span=[self.t_eval[0], self.t_eval[-1]],
-            y0=self.y0, t_eval=self.t_eval
-            )
+        '''Solve the pharmacokinetic model using scipy.integrate.solve_ivp
+
+        The time span is split at the dose breakpoints, and the step size is
+        kept below half the shortest pulse width, so the solver does not step
+        over short doses such as a bolus. Doses given as plain functions
+        have neither, and are solved over the whole span as they are.'''
+        t0, T = self.t_eval[0], self.t_eval[-1]
+        points = getattr(self.model.dose, 'breakpoints', [])
+        max_step = getattr(self.model.dose, 'resolution', np.inf) / 2
+        edges = np.concatenate([[t0], [p for p in points if t0 < p < T], [T]])
+
+        y0, ts, ys = self.y0, [], []
+        counts = {'nfev': 0, 'njev': 0, 'nlu': 0}
+        for a, b in zip(edges[:-1], edges[1:]):
+            # Always evaluate at b to carry the state into the next segment
+            t_eval = self.t_eval[(self.t_eval >= a) & (self.t_eval < b)]
+            sol = scipy.integrate.solve_ivp(
+                fun=lambda t, y: self.model.rhs(t, y),
+                t_span=[a, b], y0=y0, t_eval=np.append(t_eval, b),
+                max_step=max_step
+                )
+            for key in counts:
+                counts[key] += sol[key]
+            if not sol.success:
+                # Keep the solution so far and report the failing segment
+                ts.append(sol.t)
+                ys.append(sol.y)
+                break
+            y0 = sol.y[:, -1]
+            ts.append(sol.t[:-1])
+            ys.append(sol.y[:, :-1])
+        else:
+            ts.append(sol.t[-1:])
+            ys.append(sol.y[:, -1:])
+
+        sol.t, sol.y = np.concatenate(ts), np.hstack(ys)
+        sol.update(counts)
         self.sol = sol
 
     def plotResults(self, ax=None):
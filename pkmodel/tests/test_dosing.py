@@ -0,0 +1,99 @@
+import unittest
+import numpy as np
+import pkmodel as pk
+
+
+class DoseTest(unittest.TestCase):
+    """
+    Tests the :class:`Dose` class and dosing functions.
+    """
+    def setUp(self):
+        self.t = np.linspace(0, 3, 1001)
+
+    def test_builtins(self):
+        """
+        Tests the built-in doses against their closed forms.
+        """
+        t = self.t
+        np.testing.assert_allclose(pk.dosing.constant(0.5)(t), 0.5)
+        np.testing.assert_allclose(pk.dosing.pulse(1, 0.1, 0.2)(t),
+                                   1 * (0.1 <= t % 0.2))
+        np.testing.assert_allclose(pk.dosing.sawtooth(2, 0.1)(t),
+                                   2 * (t % 0.1) / 0.1)
+        np.testing.assert_allclose(pk.dosing.sine(0.5, 0.25)(t),
+                                   0.5 * np.sin(t * 2 * np.pi / 0.25) + 0.5)
+
+    def test_scalar(self):
+        """
+        Tests a dose evaluated at a single time returns a scalar.
+        """
+        self.assertEqual(pk.dosing.constant(5.)(0.5), 5.)
+        self.assertEqual(np.ndim(pk.dosing.sine(1., 1.)(0.5)), 0)
+        dose = (pk.dosing.pulse(3, 0.07, 0.3).shift(0.41).window(0.2, 2.7)
+                + 2 * pk.dosing.sine(1, 0.7) - pk.dosing.bolus(4, 1.3, dt=0.2))
+        np.testing.assert_allclose([dose(float(t)) for t in self.t],
+                                   dose(self.t), atol=1e-12)
+        dose = sum(pk.dosing.pulse(1, 0.1, 0.2).window(i / 4, i / 4 + 0.1)
+                   for i in range(12))
+        np.testing.assert_allclose([dose(float(t)) for t in self.t],
+                                   dose(self.t), atol=1e-12)
+
+    def test_algebra(self):
+        """
+        Tests sums, scaling, shifts and windows of doses.
+        """
+        t = self.t
+        dose = (2 * pk.dosing.pulse(1, 0.1, 0.2).shift(1).window(1, 2)
+                - 1 + pk.dosing.sawtooth(1, 0.5).window(2))
+        expected = (np.where((1 <= t) & (t < 2), 2 * (0.1 <= (t - 1) % 0.2), 0)
+                    - 1 + np.where(2 <= t, (t % 0.5) / 0.5, 0))
+        np.testing.assert_allclose(dose(t), expected, atol=1e-12)
+
+    def test_bolus(self):
+        """
+        Tests a bolus delivers its total amount over its duration.
+        """
+        dose = pk.dosing.bolus(10, 0.5, dt=0.1)
+        np.testing.assert_allclose(dose([0.4, 0.5, 0.55, 0.6]),
+                                   [0, 100, 100, 0])
+        np.testing.assert_allclose(dose.breakpoints, [0.5, 0.6])
+        for dt in [0, -0.1]:
+            with self.assertRaises(ValueError):
+                pk.dosing.bolus(10, 0.5, dt=dt)
+
+    def test_levels(self):
+        """
+        Tests step levels switch off exactly outside every window.
+        """
+        dose = (pk.dosing.constant(0.1).window(0, 1)
+                + pk.dosing.constant(0.2).window(0.5, 2)
+                + pk.dosing.constant(0.3).window(0.7, 1.5))
+        self.assertEqual(dose(2.5), 0)
+        self.assertEqual(dose(-1.), 0)
+        np.testing.assert_allclose(dose([0.6, 0.8, 1.2]), [0.3, 0.6, 0.5])
+
+    def test_integrate(self):
+        """
+        Tests doses integrate exactly, including narrow pulses.
+        """
+        self.assertAlmostEqual(pk.dosing.constant(2).integrate(0, 3), 6)
+        self.assertAlmostEqual(
+            pk.dosing.pulse(1, 0.199, 0.2).integrate(0, 2), 0.01)
+        self.assertAlmostEqual(pk.dosing.sine(1, 0.5).integrate(0, 2), 2)
+        dose = (pk.dosing.sawtooth(1, 0.5).shift(0.1).window(0.3, 1.3)
+                + pk.dosing.bolus(5, 2, dt=0.5))
+        self.assertAlmostEqual(dose.integrate(-1, 3), 5.5)
+        for a, b in [(2, 1), (-np.inf, 1), (0, np.inf)]:
+            with self.assertRaises(ValueError):
+                dose.integrate(a, b)
+
+    def test_simplify(self):
+        """
+        Tests composite doses are merged into a compact representation.
+        """
+        dose = sum([pk.dosing.sawtooth(1, 0.1)] * 10) + sum(
+            [pk.dosing.constant(1).window(i, i + 1) for i in range(3)])
+        self.assertEqual(len(dose.breakpoints), 4)
+        np.testing.assert_allclose(dose.breakpoints, [0, 1, 2, 3])
+        np.testing.assert_allclose(dose([-0.95, 0.05, 2.05, 3.05]),
+                                   [5, 6, 6, 5])
@@ -183,5 +183,12 @@ class TestPharmacokineticModels(unittest.TestCase):
         expected_dose = 6.0  # X is 6.0
         self.assertEqual(model.dose(t), expected_dose)
 
+    def test_DefaultDose(self):
+        # Test the default dose is a constant Dose of strength X
+        model = pk.TwoCellModel()
+        self.assertIsInstance(model.dose, pk.dosing.Dose)
+        self.assertEqual(model.dose(0.5), model.X)
+        self.assertEqual(pk.Solution(model, T=2.).total_dose, 2 * model.X)
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 import pkmodel as pk
 
 
@@ -13,3 +14,46 @@ class SolutionTest(unittest.TestCase):
         model = pk.Solution()
         self.assertEqual(model.value, 44)
 
+    def test_solve_bolus(self):
+        """
+        Tests a short bolus reaches the model state.
+        """
+        dose = pk.dosing.constant(0) + pk.dosing.bolus(10, 0.5, dt=0.01)
+        solution = pk.Solution(pk.TwoCellModel(dose=dose))
+        solution.solve()
+        self.assertEqual(len(solution.sol.t), 1000)
+        q_c = solution.sol.y[0]
+        self.assertEqual(q_c[solution.sol.t < 0.5].max(), 0)
+        self.assertGreater(q_c[-1], 1)
+
+    def test_solve_windowed(self):
+        """
+        Tests short windowed periodic doses reach the model state.
+        """
+        for dose in [pk.dosing.sawtooth(1000, 1).window(0.5, 0.51),
+                     pk.dosing.pulse(100, 0.005, 0.01).window(0.5, 0.51)]:
+            solution = pk.Solution(pk.TwoCellModel(dose=dose))
+            solution.solve()
+            q_c = solution.sol.y[0]
+            self.assertEqual(q_c[solution.sol.t < 0.5].max(), 0)
+            self.assertGreater(q_c[-1], 0.1)
+
+    def test_solve_failure(self):
+        """
+        Tests a failing segment stops the solve and is reported.
+        """
+        dose = pk.dosing.constant(0) + pk.dosing.bolus(1, 1.5, dt=0.01)
+        model = pk.TwoCellModel(dose=dose)
+        model.rhs = lambda t, y: [y[0]**2, 0]  # Blows up at t = 1
+        solution = pk.Solution(model, T=2, y0=np.array([1., 0.]))
+        solution.solve()
+        self.assertFalse(solution.sol.success)
+        self.assertLess(solution.sol.t[-1], 1)
+
+    def test_total_dose(self):
+        """
+        Tests the total dose of a many-bolus regimen.
+        """
+        dose = sum(pk.dosing.bolus(1, i * 0.5, dt=0.01) for i in range(40))
+        solution = pk.Solution(pk.TwoCellModel(dose=dose), T=20)
+        self.assertEqual(solution.total_dose, 40)